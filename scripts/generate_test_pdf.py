@@ -6,56 +6,110 @@ It's intentionally a lightweight renderer (not a full Markdown implementation).
 
 from __future__ import annotations
 
+import codecs
+import mmap
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, TableStyle
+
+_ROW_RE = re.compile(r"^\s*\|(.*)\|\s*$")
+_SEP_RE = re.compile(r"[\s\-:|]*")
+_UL_RE = re.compile(r"^\s*-\s+(.*)$")
+_OL_RE = re.compile(r"^\s*(\d+)\.\s+(.*)$")
+
+# Long tables are emitted as several LongTables so each split only lays out a bounded
+# number of rows; the header row is repeated at the top of every chunk.
+_TABLE_CHUNK_ROWS = 200
+
+_WRITE_BUFFER_SIZE = 1 << 20
+
+_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 4),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+    ]
+)
+
+
+@lru_cache(maxsize=1)
+def _styles() -> dict[int | str, ParagraphStyle]:
+    """Build the paragraph styles once; they are shared by every conversion."""
+    base = getSampleStyleSheet()
+    bullet = ParagraphStyle("Bullet", parent=base["BodyText"], leftIndent=14, bulletIndent=6)
+    # Vertical gaps are expressed as spaceAfter/spaceBefore on the styles rather than
+    # as separate Spacer flowables, which keeps the story short for platypus.
+    return {
+        1: ParagraphStyle("H1", parent=base["Heading1"], fontSize=20, spaceAfter=10),
+        2: ParagraphStyle("H2", parent=base["Heading2"], fontSize=16, spaceAfter=8),
+        3: ParagraphStyle("H3", parent=base["Heading3"], fontSize=14, spaceAfter=6),
+        4: ParagraphStyle("H4", parent=base["Heading4"], fontSize=12, spaceAfter=6),
+        5: ParagraphStyle("H5", parent=base["Heading5"], fontSize=11, spaceAfter=4),
+        6: ParagraphStyle("H6", parent=base["Heading6"], fontSize=10, spaceAfter=4),
+        "body": ParagraphStyle("BodySpaced", parent=base["BodyText"], spaceAfter=6),
+        "rule": ParagraphStyle("Rule", parent=base["BodyText"], spaceBefore=8, spaceAfter=8),
+        "code": ParagraphStyle("CodeSpaced", parent=base["Code"], spaceAfter=8),
+        "bullet": bullet,
+        "bullet_last": ParagraphStyle("BulletLast", parent=bullet, spaceAfter=8),
+    }
 
 
 def _parse_table(lines: list[str]) -> list[list[str]]:
-    rows: list[list[str]] = []
-    for line in lines:
-        line = line.strip()
-        if not (line.startswith("|") and line.endswith("|")):
-            continue
-        cells = [c.strip() for c in line.strip("|").split("|")]
-        rows.append(cells)
+    matches = [m for line in lines if (m := _ROW_RE.match(line))]
+    rows = [[c.strip() for c in m.group(1).split("|")] for m in matches]
     # drop separator row (---) if present
-    if len(rows) >= 2 and all(set(c) <= {"-", ":"} for c in rows[1]):
+    if len(rows) >= 2 and _SEP_RE.fullmatch(matches[1].group(1)):
         rows.pop(1)
     return rows
 
 
+def _starts_block(line: str) -> bool:
+    """Whether `line` ends a run of plain paragraph lines."""
+    stripped = line.strip()
+    return (
+        not stripped
+        or line.startswith("#")
+        or stripped == "---"
+        or stripped.startswith(("|", "!["))
+        or _UL_RE.match(line) is not None
+        or _OL_RE.match(line) is not None
+    )
+
+
+def _read_markdown(md_path: Path) -> str:
+    # Decode straight from the page-cache backed mapping: one str allocation, no
+    # intermediate bytes copy.
+    with md_path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return codecs.decode(mm, "utf-8")
+
+
 def write_markdown_as_pdf(md_path: Path, pdf_path: Path) -> None:
-    md = md_path.read_text(encoding="utf-8")
+    md = _read_markdown(md_path)
 
-    doc = SimpleDocTemplate(
-        str(pdf_path), pagesize=letter, leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36
-    )
-    styles = getSampleStyleSheet()
-
-    # Simple heading styles
-    h_styles = {
-        1: ParagraphStyle("H1", parent=styles["Heading1"], fontSize=20, spaceAfter=10),
-        2: ParagraphStyle("H2", parent=styles["Heading2"], fontSize=16, spaceAfter=8),
-        3: ParagraphStyle("H3", parent=styles["Heading3"], fontSize=14, spaceAfter=6),
-        4: ParagraphStyle("H4", parent=styles["Heading4"], fontSize=12, spaceAfter=6),
-        5: ParagraphStyle("H5", parent=styles["Heading5"], fontSize=11, spaceAfter=4),
-        6: ParagraphStyle("H6", parent=styles["Heading6"], fontSize=10, spaceAfter=4),
-    }
+    styles = _styles()
 
     story = []
     lines = md.splitlines()
     i = 0
 
-    bullet_style = ParagraphStyle("Bullet", parent=styles["BodyText"], leftIndent=14, bulletIndent=6)
-
     while i < len(lines):
-        line = lines[i].rstrip("\n")
+        # splitlines() already dropped the newline; strip once and reuse it below.
+        line = lines[i]
+        stripped = line.strip()
 
-        if not line.strip():
+        if not stripped:
             i += 1
             continue
 
@@ -64,78 +118,77 @@ def write_markdown_as_pdf(md_path: Path, pdf_path: Path) -> None:
             level = len(line) - len(line.lstrip("#"))
             level = min(max(level, 1), 6)
             text = line[level:].strip()
-            story.append(Paragraph(text, h_styles[level]))
+            story.append(Paragraph(text, styles[level]))
             i += 1
             continue
 
         # Horizontal rule
-        if line.strip() == "---":
-            story.append(Spacer(1, 8))
-            story.append(Paragraph("—" * 40, styles["BodyText"]))
-            story.append(Spacer(1, 8))
+        if stripped == "---":
+            story.append(Paragraph("—" * 40, styles["rule"]))
             i += 1
             continue
 
         # Table block
-        if line.strip().startswith("|"):
+        if stripped.startswith("|"):
             table_lines = []
             while i < len(lines) and lines[i].strip().startswith("|"):
                 table_lines.append(lines[i])
                 i += 1
             rows = _parse_table(table_lines)
             if rows:
-                tbl = LongTable(rows, repeatRows=1)
-                tbl.setStyle(
-                    TableStyle(
-                        [
-                            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                            ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                            ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                            ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                        ]
-                    )
-                )
-                story.append(tbl)
-                story.append(Spacer(1, 12))
+                header, body = rows[:1], rows[1:]
+                starts = range(0, len(body), _TABLE_CHUNK_ROWS) if body else [0]
+                for start in starts:
+                    is_last = start + _TABLE_CHUNK_ROWS >= len(body)
+                    chunk = header + body[start : start + _TABLE_CHUNK_ROWS]
+                    tbl = LongTable(chunk, repeatRows=1, spaceAfter=12 if is_last else 0)
+                    tbl.setStyle(_TABLE_STYLE)
+                    story.append(tbl)
             continue
 
         # Unordered list
-        if line.lstrip().startswith("-"):
-            while i < len(lines) and lines[i].lstrip().startswith("-"):
-                item = lines[i].lstrip()[1:].strip()
-                story.append(Paragraph(item, bullet_style, bulletText="•"))
+        if m := _UL_RE.match(line):
+            items = []
+            while m:
+                items.append(m.group(1).strip())
                 i += 1
-            story.append(Spacer(1, 8))
+                m = _UL_RE.match(lines[i]) if i < len(lines) else None
+            for n, item in enumerate(items, start=1):
+                style = styles["bullet_last"] if n == len(items) else styles["bullet"]
+                story.append(Paragraph(item, style, bulletText="•"))
             continue
 
         # Ordered list
-        if line.strip()[:2].isdigit() and "." in line:
-            # naive check for "1. foo"
-            while i < len(lines):
-                line_str = lines[i].strip()
-                if len(line_str) < 3 or not line_str[0].isdigit() or line_str[1] != ".":
-                    break
-                item = line_str[2:].strip()
-                story.append(Paragraph(item, bullet_style, bulletText=f"{line_str[0]}."))
+        if m := _OL_RE.match(line):
+            items = []
+            while m:
+                items.append((f"{m.group(1)}.", m.group(2).strip()))
                 i += 1
-            story.append(Spacer(1, 8))
+                m = _OL_RE.match(lines[i]) if i < len(lines) else None
+            for n, (number, item) in enumerate(items, start=1):
+                style = styles["bullet_last"] if n == len(items) else styles["bullet"]
+                story.append(Paragraph(item, style, bulletText=number))
             continue
 
         # Images (render as caption)
-        if line.strip().startswith("!["):
-            story.append(Paragraph(line.strip(), styles["Code"]))
-            story.append(Spacer(1, 8))
+        if stripped.startswith("!["):
+            story.append(Paragraph(stripped, styles["code"]))
             i += 1
             continue
 
-        # Default paragraph (links will just render as text)
-        story.append(Paragraph(line, styles["BodyText"]))
-        story.append(Spacer(1, 6))
+        # Default paragraph (links will just render as text). Consecutive plain lines
+        # are soft breaks in markdown, so they become a single Paragraph.
+        para = [stripped]
         i += 1
+        while i < len(lines) and not _starts_block(lines[i]):
+            para.append(lines[i].strip())
+            i += 1
+        story.append(Paragraph(" ".join(para), styles["body"]))
 
-    doc.build(story)
+    # Hand reportlab a file with a large buffer so the PDF goes out in few, big writes.
+    with open(pdf_path, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
+        doc = SimpleDocTemplate(f, pagesize=letter, leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36)
+        doc.build(story)
 
 
 def main() -> None:
@@ -1,20 +1,42 @@
 from __future__ import annotations
 
+import asyncio
+from functools import lru_cache
 from pathlib import Path
 
-import logfire
 import typer
 from rich.console import Console
 from rich.panel import Panel
-from rich.table import Table
 
-from pdfmder.converter import convert_pdf_to_markdown
+# logfire, the converter (pypdfium2, pydantic_ai, openai) and rich.table are imported
+# inside the functions that need them, so `--help` and argument errors stay fast.
 
 console = Console()
 
-# Console-only by default; user can configure a token later.
-logfire.configure(send_to_logfire=False)
-logfire.instrument_pydantic_ai()
+
+@lru_cache(maxsize=1)
+def _configure_logfire() -> None:
+    import logfire
+
+    # Console-only by default; user can configure a token later.
+    logfire.configure(send_to_logfire=False)
+    logfire.instrument_pydantic_ai()
+
+
+def _next_free_path(out_path: Path) -> Path:
+    """Return `out_path`, or the first free `<stem>-<n><suffix>` sibling if it exists.
+
+    The parent directory is listed once and candidates are checked against that set,
+    rather than stat-ing every candidate.
+    """
+    if not out_path.exists():
+        return out_path
+
+    taken = {p.name for p in out_path.parent.iterdir()}
+    counter = 1
+    while f"{out_path.stem}-{counter}{out_path.suffix}" in taken:
+        counter += 1
+    return out_path.parent / f"{out_path.stem}-{counter}{out_path.suffix}"
 
 
 def cli(
@@ -22,6 +44,13 @@ def cli(
     output: Path | None = typer.Option(None, "-o", "--output", help="Output markdown file path"),
 ) -> None:
     """pdfmder: convert PDF files to Markdown."""
+    import logfire
+    from rich.table import Table
+
+    from pdfmder.converter import convert_pdf_to_markdown
+
+    _configure_logfire()
+
     with logfire.span("pdfmder.cli", pdf=str(pdf), output=str(output) if output else None):
         pdf_path = pdf
         if not pdf_path.is_absolute():
@@ -43,23 +72,13 @@ def cli(
         elif not out_path.is_absolute():
             out_path = Path.cwd() / out_path
 
-        if out_path.exists():
-            stem = out_path.stem
-            suffix = out_path.suffix
-            parent = out_path.parent
-            counter = 1
-            while True:
-                candidate = parent / f"{stem}-{counter}{suffix}"
-                if not candidate.exists():
-                    out_path = candidate
-                    break
-                counter += 1
+        out_path = _next_free_path(out_path)
 
         logfire.info("pdfmder.convert.start", pdf=str(pdf_path), output=str(out_path))
 
         try:
             with console.status("Converting PDF → Markdown…", spinner="dots"):
-                md, metrics = convert_pdf_to_markdown(pdf_path)
+                md, metrics = asyncio.run(convert_pdf_to_markdown(pdf_path))
         except RuntimeError as e:
             console.print(Panel.fit(str(e), title="pdfmder", style="red"))
             raise typer.Exit(code=1)
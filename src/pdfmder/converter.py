@@ -1,63 +1,189 @@
 from __future__ import annotations
 
+import asyncio
+import io
+import os
 from pathlib import Path
 
 import logfire
 
-from pdfmder.llm_markdown import PageMetrics, convert_to_markdown
+from pdfmder.llm_markdown import (
+    LLMConfig,
+    PageInput,
+    PageMetrics,
+    add_batch_cost,
+    convert_pages_batch,
+    convert_to_markdown,
+)
 from pdfmder.pdfium_extract import extract_pdf_assets_tmp
+from pdfmder.pdfium_images import write_page_images
 
 
-def convert_pdf_to_markdown(pdf_path: Path) -> tuple[str, list[PageMetrics]]:
+def _page_spans(direct: list[bool], batch_size: int) -> list[tuple[int, int]]:
+    """Split pages into `(start, stop)` spans of at most `batch_size` LLM pages.
+
+    Pages converted without the LLM (`direct[i]`) always form a span of their own.
+    """
+    spans: list[tuple[int, int]] = []
+    start = 0
+    for i, is_direct in enumerate(direct):
+        if is_direct or i - start == batch_size:
+            if i > start:
+                spans.append((start, i))
+            start = i
+        if is_direct:
+            spans.append((i, i + 1))
+            start = i + 1
+    if start < len(direct):
+        spans.append((start, len(direct)))
+    return spans
+
+
+def _join_pages(md_pages: list[str]) -> str:
+    """Join page markdown with horizontal rules in a single pass, skipping empty pages."""
+    buf = io.StringIO()
+    sep = ""
+    for page in md_pages:
+        text = page.strip("\n")
+        if not text:
+            continue
+        buf.write(sep)
+        buf.write(text)
+        sep = "\n\n---\n\n"
+    buf.write("\n")
+    return buf.getvalue()
+
+
+async def convert_pdf_to_markdown(pdf_path: Path) -> tuple[str, list[PageMetrics]]:
     """Convert a PDF to Markdown page-by-page.
 
     For each page, we call an LLM (via Pydantic AI Gateway) with:
     - extracted text for prev/current/next pages
-    - rendered images for prev/current/next pages
+    - rendered images for prev/current/next pages, for scanned pages only unless
+      `PDFMDER_ALWAYS_SEND_IMAGE=1`
     - previous page's generated markdown
 
     The LLM returns Markdown for the current page.
+
+    With `PDFMDER_PAGE_BATCH` above 1 (default 1), adjacent pages are sent in batches
+    of that size per LLM call; a batch whose response cannot be split back into pages
+    is converted page by page instead, and the aborted call is counted in their
+    metrics. Batches are converted concurrently, bounded by `PDFMDER_CONCURRENCY`
+    (default 8). The previous page's markdown is only available when batches run one
+    at a time, so it is passed along only when `PDFMDER_CONCURRENCY=1`.
+
+    With `PDFMDER_DIRECT_PAGES=1`, pages that are a single column of plain text are
+    converted straight from the PDF text layer without an LLM call.
     """
-    with logfire.span("pdfmder.convert_pdf_to_markdown", pdf_path=str(pdf_path)):
-        with extract_pdf_assets_tmp(pdf_path) as (image_paths, page_texts, page_count):
+    # Fail fast on bad settings or missing credentials, before any page is rendered.
+    config = LLMConfig.from_env()
+    concurrency = config.concurrency
+
+    dump_dir = os.getenv("PDFMDER_DUMP_IMAGES")
+
+    with logfire.span("pdfmder.convert_pdf_to_markdown", pdf_path=str(pdf_path), concurrency=concurrency):
+        # Text pages are sent without images, so only scanned pages (and their
+        # neighbours, which go along in full context mode) need rendering.
+        with extract_pdf_assets_tmp(
+            pdf_path,
+            max_side=config.image_max,
+            all_images=config.always_send_images or bool(dump_dir),
+            neighbour_images=not config.compact_context,
+            direct_markdown=os.getenv("PDFMDER_DIRECT_PAGES", "0") == "1",
+        ) as (page_images, page_texts, direct_pages, page_count):
             logfire.info(
-                "pdfmder.extract_pdf_assets.done", pages=page_count, images=len(image_paths), texts=len(page_texts)
+                "pdfmder.extract_pdf_assets.done", pages=page_count, images=len(page_images), texts=len(page_texts)
             )
 
-            md_pages: list[str] = []
-            page_metrics: list[PageMetrics] = []
-            prev_md: str | None = None
+            if dump_dir:
+                paths = write_page_images(page_images, Path(dump_dir))
+                logfire.info("pdfmder.page_images.dumped", directory=dump_dir, images=len(paths))
 
-            for i in range(page_count):
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def convert_page(i: int, prev_md: str | None) -> tuple[str, PageMetrics]:
                 prev_text = page_texts[i - 1] if i > 0 else None
-                prev_image = image_paths[i - 1] if i > 0 else None
+                prev_image = page_images[i - 1] if i > 0 else None
 
                 curr_text = page_texts[i]
-                curr_image = image_paths[i]
+                curr_image = page_images[i]
 
                 next_text = page_texts[i + 1] if i + 1 < page_count else None
-                next_image = image_paths[i + 1] if i + 1 < page_count else None
-
-                logfire.info(
-                    "pdfmder.page.start",
-                    page=i + 1,
-                    pages=page_count,
-                    has_prev=i > 0,
-                    has_next=i + 1 < page_count,
-                )
-
-                md, metrics = convert_to_markdown(
-                    prev_text=prev_text,
-                    prev_image=prev_image,
-                    curr_text=curr_text,
-                    curr_image=curr_image,
-                    next_text=next_text,
-                    next_image=next_image,
-                    prev_markdown=prev_md,
-                )
-
-                md_pages.append(md)
-                page_metrics.append(metrics)
-                prev_md = md
-
-            return "\n\n---\n\n".join(p.strip("\n") for p in md_pages).strip() + "\n", page_metrics
+                next_image = page_images[i + 1] if i + 1 < page_count else None
+
+                async with semaphore:
+                    logfire.info(
+                        "pdfmder.page.start",
+                        page=i + 1,
+                        pages=page_count,
+                        has_prev=i > 0,
+                        has_next=i + 1 < page_count,
+                    )
+
+                    return await convert_to_markdown(
+                        prev_text=prev_text,
+                        prev_image=prev_image,
+                        curr_text=curr_text,
+                        curr_image=curr_image,
+                        next_text=next_text,
+                        next_image=next_image,
+                        prev_markdown=prev_md,
+                        config=config,
+                    )
+
+            async def convert_batch(start: int, stop: int, prev_md: str | None) -> list[tuple[str, PageMetrics]]:
+                direct_md = direct_pages[start]
+                if direct_md is not None:
+                    logfire.info("pdfmder.page.direct", page=start + 1, pages=page_count)
+                    metrics = PageMetrics(
+                        model="direct",
+                        input_tokens=0,
+                        output_tokens=0,
+                        total_tokens=0,
+                        duration_s=0.0,
+                        fallback=False,
+                    )
+                    return [(direct_md, metrics)]
+
+                batch_cost: PageMetrics | None = None
+                if stop - start > 1:
+                    async with semaphore:
+                        logfire.info("pdfmder.batch.start", first_page=start + 1, last_page=stop, pages=page_count)
+                        batch = await convert_pages_batch(
+                            [PageInput(text=page_texts[i], image=page_images[i]) for i in range(start, stop)],
+                            prev_text=page_texts[start - 1] if start > 0 else None,
+                            next_text=page_texts[stop] if stop < page_count else None,
+                            prev_markdown=prev_md,
+                            config=config,
+                        )
+                    if not isinstance(batch, PageMetrics):
+                        return batch
+                    batch_cost = batch
+
+                # Single page, or a batch that could not be used: one request per page.
+                page_results: list[tuple[str, PageMetrics]] = []
+                if concurrency == 1:
+                    for i in range(start, stop):
+                        md, metrics = await convert_page(i, prev_md)
+                        page_results.append((md, metrics))
+                        prev_md = md
+                else:
+                    page_results = list(await asyncio.gather(*(convert_page(i, None) for i in range(start, stop))))
+                # The aborted batch call still cost tokens and time.
+                return page_results if batch_cost is None else add_batch_cost(page_results, batch_cost)
+
+            spans = _page_spans([md is not None for md in direct_pages], config.page_batch)
+            results: list[tuple[str, PageMetrics]] = []
+            if concurrency == 1:
+                prev_md: str | None = None
+                for start, stop in spans:
+                    results.extend(await convert_batch(start, stop, prev_md))
+                    prev_md = results[-1][0]
+            else:
+                batches = await asyncio.gather(*(convert_batch(start, stop, None) for start, stop in spans))
+                results = [result for batch in batches for result in batch]
+
+            md_pages = [md for md, _ in results]
+            page_metrics = [metrics for _, metrics in results]
+
+            return _join_pages(md_pages), page_metrics
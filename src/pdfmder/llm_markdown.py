@@ -5,19 +5,28 @@ This module contains the page-level LLM call used by the PDF → Markdown pipeli
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, replace
 from functools import lru_cache
 from pathlib import Path
 from time import perf_counter
 from typing import cast
 
+import httpx
 import logfire
-from openai import AsyncOpenAI, RateLimitError
-from pydantic_ai import Agent
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient
+from pydantic_ai import Agent, ModelHTTPError
 from pydantic_ai.messages import BinaryContent
 from pydantic_ai.models.openai import OpenAIResponsesModel, OpenAIResponsesModelSettings
 from pydantic_ai.providers.openai import OpenAIProvider
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import RetryCallState, retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from pdfmder.pdfium_extract import is_scanned_page
 
 
 @dataclass(frozen=True)
@@ -30,18 +39,52 @@ class PageMetrics:
     fallback: bool
 
 
+# All static instructions live in the system prompt so every page request starts with
+# the same prefix, which OpenAI's automatic prompt caching can reuse across pages.
 SYSTEM_PROMPT = (
-    "You are a document conversion assistant. Convert ONLY the current PDF page into "
-    "precise, high-quality Markdown. Preserve structure such as headings, tables, "
-    "lists, bold text, and callouts. Use surrounding pages only for context; do not "
-    "repeat their content. Return Markdown only—no explanations or code fences."
+    "You are a document conversion assistant. Convert the current PDF page or pages "
+    "named in the request into precise, high-quality Markdown, using their extracted "
+    "text and, when provided, the page images to reflect their structure. The previous "
+    "and next pages are context only; do not include their content. Return Markdown "
+    "only—no explanations or code fences.\n\n"
+    "Rules:\n"
+    "- Use ATX headings only (#, ##, ###).\n"
+    "- Preserve lists, numbering, bold text, and callouts.\n"
+    "- Reconstruct tables using GitHub-flavored Markdown with a header row and separator.\n"
+    "- Keep column counts consistent and do not invent content."
 )
 
 
-@lru_cache(maxsize=1)
-def _get_openai_client() -> AsyncOpenAI:
-    import os
+# PDFMDER_CONTEXT_MODE=compact: neighbouring pages only matter at the boundaries (a
+# table or list that continues), so send short excerpts of them and no images.
+_COMPACT_PREV_MARKDOWN_CHARS = 2000
+_COMPACT_NEIGHBOUR_TEXT_CHARS = 500
+
+
+def _env_int(name: str, default: int, *, minimum: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer, got {raw!r}.") from None
+    if value < minimum:
+        raise RuntimeError(f"{name} must be at least {minimum}, got {value}.")
+    return value
+
 
+def _http_client(max_connections: int) -> DefaultAsyncHttpxClient:
+    # One keep-alive pool shared by every page request, sized to the number of pages
+    # converted concurrently so each in-flight request reuses a warm TLS connection.
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return DefaultAsyncHttpxClient(limits=limits)
+
+
+# The SDK's own retries are disabled (max_retries=0): _run_agent_with_retry owns the
+# backoff, so attempts are not multiplied across two retry layers.
+@lru_cache(maxsize=1)
+def _get_openai_client(max_connections: int) -> AsyncOpenAI:
     if os.getenv("AZURE_OPENAI_ENDPOINT"):
         api_key = os.environ.get("AZURE_OPENAI_API_KEY")
         if not api_key:
@@ -53,186 +96,438 @@ def _get_openai_client() -> AsyncOpenAI:
             base_url=base_url,
             api_key=api_key,
             default_query={"api-version": api_version},
+            http_client=_http_client(max_connections),
+            max_retries=0,
         )
 
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY must be set for OpenAI access.")
     base_url = os.environ.get("OPENAI_BASE_URL")
-    return AsyncOpenAI(api_key=api_key, base_url=base_url)
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_http_client(max_connections), max_retries=0)
 
 
 @lru_cache(maxsize=4)
-def _make_agent(model_name: str) -> Agent:
-    client = _get_openai_client()
+def _make_agent(
+    model_name: str,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    max_connections: int = 8,
+) -> Agent:
+    client = _get_openai_client(max_connections)
     provider = OpenAIProvider(openai_client=client)
     model = OpenAIResponsesModel(model_name, provider=provider)
-    settings = OpenAIResponsesModelSettings()
+    # A fixed cache key routes every page request to the same prompt-cache shard.
+    settings = OpenAIResponsesModelSettings(openai_prompt_cache_key="pdfmder-page")
+    if temperature is not None:
+        settings["temperature"] = temperature
+    if max_tokens is not None:
+        settings["max_tokens"] = max_tokens
     return Agent(model=model, system_prompt=SYSTEM_PROMPT, model_settings=settings)
 
 
+@dataclass(frozen=True)
+class LLMConfig:
+    """LLM settings, resolved from the environment once per conversion.
+
+    `missing_credentials` is the fallback reason when no API key is configured and
+    pages fall back to their text layer. `image_max` is the longest side of the page
+    images sent to the model, or None for the full render.
+    """
+
+    model_name: str
+    concurrency: int = 8
+    page_batch: int = 1
+    image_max: int | None = 1568
+    allow_fallback: bool = True
+    compact_context: bool = False
+    always_send_images: bool = False
+    temperature: float | None = None
+    max_tokens: int | None = None
+    missing_credentials: str | None = None
+
+    @classmethod
+    def from_env(cls) -> LLMConfig:
+        """Parse the `PDFMDER_*` settings and check provider credentials.
+
+        Raises RuntimeError for malformed values, and for a missing API key unless
+        fallback is allowed (`PDFMDER_ALLOW_FALLBACK`, on by default).
+
+        `PDFMDER_TEMPERATURE` and `PDFMDER_MAX_OUTPUT_TOKENS` are unset by default:
+        reasoning models such as gpt-5 reject a temperature other than 1 and count
+        their reasoning tokens against the output limit.
+        """
+        # Default to direct OpenAI. When AZURE_OPENAI_ENDPOINT is set, use deployment name.
+        model_name = os.getenv("PDFMDER_MODEL", "gpt-5")
+        if model_name.startswith("gateway/openai:"):
+            model_name = model_name.removeprefix("gateway/openai:")
+        if model_name.startswith("openai:"):
+            model_name = model_name.removeprefix("openai:")
+        if os.getenv("AZURE_OPENAI_ENDPOINT"):
+            model_name = os.getenv("AZURE_OPENAI_DEPLOYMENT", model_name)
+        allow_fallback = os.getenv("PDFMDER_ALLOW_FALLBACK", "1") != "0"
+
+        temperature: float | None = None
+        raw = os.getenv("PDFMDER_TEMPERATURE", "").strip()
+        if raw:
+            try:
+                temperature = float(raw)
+            except ValueError:
+                raise RuntimeError(f"PDFMDER_TEMPERATURE must be a number, got {raw!r}.") from None
+        max_tokens = _env_int("PDFMDER_MAX_OUTPUT_TOKENS", 0, minimum=1) or None
+
+        missing_credentials: str | None = None
+        if os.getenv("AZURE_OPENAI_ENDPOINT"):
+            if not os.getenv("AZURE_OPENAI_API_KEY"):
+                if not allow_fallback:
+                    raise RuntimeError("AZURE_OPENAI_API_KEY must be set when using Azure OpenAI.")
+                missing_credentials = "missing_azure_key"
+        elif not os.getenv("OPENAI_API_KEY"):
+            if not allow_fallback:
+                raise RuntimeError("OPENAI_API_KEY must be set for OpenAI access.")
+            missing_credentials = "missing_openai_key"
+
+        return cls(
+            model_name=model_name,
+            concurrency=_env_int("PDFMDER_CONCURRENCY", 8, minimum=1),
+            page_batch=_env_int("PDFMDER_PAGE_BATCH", 1, minimum=1),
+            image_max=_env_int("PDFMDER_IMAGE_MAX", 1568, minimum=0) or None,
+            allow_fallback=allow_fallback,
+            compact_context=os.getenv("PDFMDER_CONTEXT_MODE", "full") == "compact",
+            always_send_images=os.getenv("PDFMDER_ALWAYS_SEND_IMAGE", "0") == "1",
+            temperature=temperature,
+            max_tokens=max_tokens,
+            missing_credentials=missing_credentials,
+        )
+
+
+def _media_type(data: bytes) -> str:
+    return "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+
+
+@lru_cache(maxsize=16)
+def _image_content(data: bytes) -> BinaryContent:
+    # Neighbouring pages share images (page i is next, then current, then previous),
+    # so the same BinaryContent is reused across slots.
+    return BinaryContent(data=data, media_type=_media_type(data))
+
+
+_MULTI_NL = re.compile(r"\n{3,}")
+
+
+def _fallback_markdown(text: str) -> str:
+    """Plain-text stand-in for a page when the LLM is unavailable."""
+    cleaned = text.strip()
+    if not cleaned:
+        return ""
+    return _MULTI_NL.sub("\n\n", cleaned) + "\n"
+
+
+def _usage_from_call(result: object) -> object | None:
+    usage = getattr(result, "usage", None)
+    return usage() if callable(usage) else usage
+
+
+def _usage_from_result_usage(result: object) -> object | None:
+    return getattr(result, "result_usage", None)
+
+
+def _usage_from_usage_info(result: object) -> object | None:
+    return getattr(result, "usage_info", None)
+
+
+def _usage_from_model_dump(result: object) -> object | None:
+    model_dump = getattr(result, "model_dump", None)
+    if not callable(model_dump):
+        return None
+    dump = model_dump()
+    if not isinstance(dump, dict):
+        return None
+    return dump.get("usage") or dump.get("result_usage") or dump.get("usage_info")
+
+
+_USAGE_PROBES: tuple[Callable[[object], object | None], ...] = (
+    _usage_from_call,
+    _usage_from_result_usage,
+    _usage_from_usage_info,
+    _usage_from_model_dump,
+)
+
+# Result type -> the probe that found usage on it. The shape is stable per provider,
+# so discovery only runs for the first page.
+_usage_accessors: dict[type, Callable[[object], object | None]] = {}
+
+
+def _find_usage(result: object) -> object | None:
+    accessor = _usage_accessors.get(type(result))
+    if accessor is not None:
+        usage = accessor(result)
+        if usage is not None:
+            return usage
+
+    for probe in _USAGE_PROBES:
+        usage = probe(result)
+        if usage is not None:
+            _usage_accessors[type(result)] = probe
+            return usage
+    return None
+
+
+def _get_int(obj: object, *keys: str) -> int | None:
+    for key in keys:
+        if isinstance(obj, dict) and key in obj:
+            mapping = cast(dict[str, object], obj)
+            value = mapping.get(key)
+            return value if isinstance(value, int) else None
+        value = getattr(obj, key, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _extract_usage(result: object) -> tuple[int | None, int | None, int | None]:
+    usage = _find_usage(result)
+    if usage is None:
+        return None, None, None
+
+    input_tokens = _get_int(usage, "input_tokens", "prompt_tokens")
+    output_tokens = _get_int(usage, "output_tokens", "completion_tokens")
+    total_tokens = _get_int(usage, "total_tokens")
+    return input_tokens, output_tokens, total_tokens
+
+
+def _cache_dir() -> Path | None:
+    """Directory for cached page responses, or None unless `PDFMDER_CACHE=1`."""
+    if os.getenv("PDFMDER_CACHE", "0") != "1":
+        return None
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pdfmder"
+
+
+def _cache_key(config: LLMConfig, parts: list[str | BinaryContent]) -> str:
+    # Sampling settings change the output, so they are part of the key too.
+    digest = hashlib.blake2b(digest_size=32)
+    for chunk in (config.model_name, repr(config.temperature), repr(config.max_tokens), SYSTEM_PROMPT):
+        digest.update(chunk.encode("utf-8"))
+        digest.update(b"\0")
+    for part in parts:
+        digest.update(part.encode("utf-8") if isinstance(part, str) else part.data)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _read_cached_markdown(cache_dir: Path, key: str) -> str | None:
+    try:
+        raw = (cache_dir / f"{key}.json").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        return None
+    markdown = payload.get("markdown") if isinstance(payload, dict) else None
+    return markdown if isinstance(markdown, str) else None
+
+
+def _write_cached_markdown(cache_dir: Path, key: str, model_name: str, markdown: str) -> None:
+    # Write to a temp file and rename so concurrent runs never see a partial entry.
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, prefix=f"{key}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"model": model_name, "markdown": markdown}, f)
+            os.replace(tmp_name, cache_dir / f"{key}.json")
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except OSError as exc:
+        logfire.warning("pdfmder.llm.cache_write_failed", error=str(exc))
+
+
+# Rate limits, overload and gateway errors usually clear up within seconds, so they
+# are retried before a page falls back to plain text. Auth and request errors are not.
+_RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+_MAX_RETRY_AFTER_S = 60.0
+
+
+def _exception_chain(exc: BaseException | None) -> Iterator[BaseException]:
+    # pydantic-ai re-raises OpenAI errors as ModelHTTPError/ModelAPIError, keeping the
+    # original (with its response headers) as __cause__.
+    while exc is not None:
+        yield exc
+        exc = exc.__cause__
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    for err in _exception_chain(exc):
+        if isinstance(err, ModelHTTPError):
+            return err.status_code in _RETRYABLE_STATUS
+        if isinstance(err, APIStatusError):
+            return err.status_code in _RETRYABLE_STATUS
+        if isinstance(err, APIConnectionError):  # includes APITimeoutError
+            return True
+    return False
+
+
+def _retry_after_s(exc: BaseException | None) -> float | None:
+    for err in _exception_chain(exc):
+        if isinstance(err, APIStatusError):
+            headers = err.response.headers
+            try:
+                if "retry-after-ms" in headers:
+                    return float(headers["retry-after-ms"]) / 1000
+                if "retry-after" in headers:
+                    return float(headers["retry-after"])
+            except ValueError:
+                return None  # HTTP-date form; use the exponential backoff instead
+    return None
+
+
+_backoff = wait_random_exponential(multiplier=1, max=30)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    # Honour the provider's retry-after when it sends one, else jittered exponential.
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    retry_after = _retry_after_s(exc)
+    if retry_after is not None:
+        return min(max(retry_after, 0.0), _MAX_RETRY_AFTER_S)
+    return _backoff(retry_state)
+
+
+def _log_retry(retry_state: RetryCallState) -> None:
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    logfire.warning(
+        "pdfmder.llm.retry",
+        attempt=retry_state.attempt_number,
+        wait_s=retry_state.next_action.sleep if retry_state.next_action else None,
+        error=str(exc),
+    )
+
+
 @retry(
-    retry=retry_if_exception_type(RateLimitError),
+    retry=retry_if_exception(_is_retryable),
     stop=stop_after_attempt(6),
-    wait=wait_exponential(multiplier=1, min=2, max=30),
+    wait=_retry_wait,
+    before_sleep=_log_retry,
+    reraise=True,
 )
-def _run_agent_with_retry(agent: Agent, parts: list[str | BinaryContent]) -> object:
-    return agent.run_sync(parts)
+async def _run_agent_with_retry(agent: Agent, parts: list[str | BinaryContent]) -> object:
+    return await agent.run(parts)
 
 
-def convert_to_markdown(
+async def convert_to_markdown(
     *,
     prev_text: str | None,
-    prev_image: Path | None,
+    prev_image: bytes | None,
     curr_text: str,
-    curr_image: Path,
+    curr_image: bytes | None,
     next_text: str | None,
-    next_image: Path | None,
+    next_image: bytes | None,
     prev_markdown: str | None,
+    config: LLMConfig | None = None,
 ) -> tuple[str, PageMetrics]:
     """Convert a single PDF page to Markdown using OpenAI Responses via PydanticAI.
 
-    Args correspond to the page context window. Images are provided as local files.
+    Args correspond to the page context window. Images are encoded PNG or JPEG bytes, or None
+    for pages that were not rendered.
+    `config` defaults to `LLMConfig.from_env()`; pass it in to resolve settings once per document.
 
     Returns:
         Markdown for the current page.
     """
-    # Read config from environment
-    import os
-    import re
-
-    # Default to direct OpenAI. When AZURE_OPENAI_ENDPOINT is set, use deployment name.
-    model_name = os.getenv("PDFMDER_MODEL", "gpt-5")
-    if model_name.startswith("gateway/openai:"):
-        model_name = model_name.removeprefix("gateway/openai:")
-    if model_name.startswith("openai:"):
-        model_name = model_name.removeprefix("openai:")
-    if os.getenv("AZURE_OPENAI_ENDPOINT"):
-        model_name = os.getenv("AZURE_OPENAI_DEPLOYMENT", model_name)
-    allow_fallback = os.getenv("PDFMDER_ALLOW_FALLBACK", "1") != "0"
-
-    def fallback_markdown(text: str) -> str:
-        cleaned = text.strip()
-        if not cleaned:
-            return ""
-        cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
-        return cleaned + "\n"
-
-    def extract_usage(result: object) -> tuple[int | None, int | None, int | None]:
-        usage = getattr(result, "usage", None)
-        if callable(usage):
-            usage = usage()
-        if usage is None:
-            usage = getattr(result, "result_usage", None)
-        if usage is None:
-            usage = getattr(result, "usage_info", None)
-        if usage is None:
-            model_dump = getattr(result, "model_dump", None)
-            if callable(model_dump):
-                dump = model_dump()
-                if isinstance(dump, dict):
-                    usage = dump.get("usage") or dump.get("result_usage") or dump.get("usage_info")
-
-        def get_value(obj: object, *keys: str) -> int | None:
-            for key in keys:
-                if isinstance(obj, dict) and key in obj:
-                    mapping = cast(dict[str, object], obj)
-                    value = mapping.get(key)
-                    return value if isinstance(value, int) else None
-                value = getattr(obj, key, None)
-                if isinstance(value, int):
-                    return value
-            return None
-
-        if usage is None:
-            return None, None, None
-
-        input_tokens = get_value(usage, "input_tokens", "prompt_tokens")
-        output_tokens = get_value(usage, "output_tokens", "completion_tokens")
-        total_tokens = get_value(usage, "total_tokens")
-        return input_tokens, output_tokens, total_tokens
+    if config is None:
+        config = LLMConfig.from_env()
+    model_name = config.model_name
+
+    if config.compact_context:
+        if prev_markdown:
+            prev_markdown = prev_markdown[-_COMPACT_PREV_MARKDOWN_CHARS:]
+        if prev_text:
+            prev_text = prev_text[-_COMPACT_NEIGHBOUR_TEXT_CHARS:]
+        if next_text:
+            next_text = next_text[:_COMPACT_NEIGHBOUR_TEXT_CHARS]
+        prev_image = None
+        next_image = None
 
     start_time = perf_counter()
 
-    # Basic runtime validation for provider credentials.
-    if os.getenv("AZURE_OPENAI_ENDPOINT") and not os.getenv("AZURE_OPENAI_API_KEY"):
-        if allow_fallback:
-            logfire.warning(
-                "pdfmder.llm.fallback",
-                reason="missing_azure_key",
-                model=model_name,
-            )
-            duration_s = perf_counter() - start_time
-            return (
-                fallback_markdown(curr_text),
-                PageMetrics(
-                    model=model_name,
-                    input_tokens=None,
-                    output_tokens=None,
-                    total_tokens=None,
-                    duration_s=duration_s,
-                    fallback=True,
-                ),
-            )
-        raise RuntimeError("AZURE_OPENAI_API_KEY must be set when using Azure OpenAI.")
-
-    if not os.getenv("AZURE_OPENAI_ENDPOINT") and not os.getenv("OPENAI_API_KEY"):
-        if allow_fallback:
-            logfire.warning(
-                "pdfmder.llm.fallback",
-                reason="missing_openai_key",
+    # Credentials were checked once in LLMConfig.from_env; without them every page
+    # falls back to its text layer.
+    if config.missing_credentials is not None:
+        logfire.warning(
+            "pdfmder.llm.fallback",
+            reason=config.missing_credentials,
+            model=model_name,
+        )
+        duration_s = perf_counter() - start_time
+        return (
+            _fallback_markdown(curr_text),
+            PageMetrics(
                 model=model_name,
-            )
-            duration_s = perf_counter() - start_time
-            return (
-                fallback_markdown(curr_text),
-                PageMetrics(
-                    model=model_name,
-                    input_tokens=None,
-                    output_tokens=None,
-                    total_tokens=None,
-                    duration_s=duration_s,
-                    fallback=True,
-                ),
-            )
-        raise RuntimeError("OPENAI_API_KEY must be set for OpenAI access.")
+                input_tokens=None,
+                output_tokens=None,
+                total_tokens=None,
+                duration_s=duration_s,
+                fallback=True,
+            ),
+        )
 
-    agent = _make_agent(model_name)
+    agent = _make_agent(model_name, config.temperature, config.max_tokens, config.concurrency)
 
     def build_section(title: str, body: str | None) -> str:
         value = body if body else "None"
         return f"## {title}\n{value}"
 
+    # Only the per-page context goes in the user message; the images follow in a
+    # fixed order so requests differ as late as possible.
     prompt = "\n\n".join(
-        [
-            "Convert ONLY the current PDF page into Markdown. "
-            "Use OCR text and page images to reflect structure. "
-            "Do NOT include content from other pages. Respond with Markdown only.",
-            "Rules:\n"
-            "- Use ATX headings only (#, ##, ###).\n"
-            "- Preserve lists, numbering, and callouts.\n"
-            "- Reconstruct tables using GitHub-flavored Markdown with a header row and separator.\n"
-            "- Keep column counts consistent and do not invent content.",
+        (
+            "Convert ONLY the current page; do not include content from other pages.",
             build_section("Previous Page Markdown", prev_markdown),
             build_section("Previous Page Text", prev_text),
             build_section("Current Page Text", curr_text),
             build_section("Next Page Text", next_text),
-        ]
+        )
     )
 
-    # Provide images as ImageUrl parts. force_download=True ensures local file is read and sent.
+    # Provide images as in-memory BinaryContent parts.
     parts: list[str | BinaryContent] = [prompt]
 
-    def add_image(label: str, path: Path | None) -> None:
-        if path is None:
+    def add_image(label: str, data: bytes | None) -> None:
+        if data is None:
             return
         parts.append(f"\n\n{label}:\n")
-        data = path.read_bytes()
-        parts.append(BinaryContent(data=data, media_type="image/png"))
-
-    add_image("PREVIOUS PAGE IMAGE", prev_image)
-    add_image("CURRENT PAGE IMAGE", curr_image)
-    add_image("NEXT PAGE IMAGE", next_image)
+        parts.append(_image_content(data))
+
+    # Images cost ~1.5k input tokens each; only send them when the page has no usable
+    # text layer, unless PDFMDER_ALWAYS_SEND_IMAGE=1.
+    is_scanned = is_scanned_page(curr_text)
+    send_images = is_scanned or config.always_send_images
+    logfire.info("pdfmder.llm.images", send_images=send_images, scanned=is_scanned, text_chars=len(curr_text))
+    if send_images:
+        add_image("PREVIOUS PAGE IMAGE", prev_image)
+        add_image("CURRENT PAGE IMAGE", curr_image)
+        add_image("NEXT PAGE IMAGE", next_image)
+
+    cache_dir = _cache_dir()
+    cache_key = _cache_key(config, parts) if cache_dir is not None else ""
+    if cache_dir is not None:
+        cached = _read_cached_markdown(cache_dir, cache_key)
+        if cached is not None:
+            logfire.info("pdfmder.llm.cache_hit", model=model_name, chars=len(cached))
+            return (
+                cached,
+                PageMetrics(
+                    model=model_name,
+                    input_tokens=0,
+                    output_tokens=0,
+                    total_tokens=0,
+                    duration_s=perf_counter() - start_time,
+                    fallback=False,
+                ),
+            )
 
     with logfire.span(
         "pdfmder.llm.convert_to_markdown",
@@ -241,9 +536,9 @@ def convert_to_markdown(
         has_next=next_text is not None,
     ):
         try:
-            result = _run_agent_with_retry(agent, parts)
+            result = await _run_agent_with_retry(agent, parts)
         except Exception as exc:  # noqa: BLE001
-            if allow_fallback:
+            if config.allow_fallback:
                 logfire.warning(
                     "pdfmder.llm.fallback",
                     reason="llm_error",
@@ -252,7 +547,7 @@ def convert_to_markdown(
                 )
                 duration_s = perf_counter() - start_time
                 return (
-                    fallback_markdown(curr_text),
+                    _fallback_markdown(curr_text),
                     PageMetrics(
                         model=model_name,
                         input_tokens=None,
@@ -264,12 +559,14 @@ def convert_to_markdown(
                 )
             raise
 
-        md = result.output
-        input_tokens, output_tokens, total_tokens = extract_usage(result)
+        md = result.output.strip() + "\n"
+        input_tokens, output_tokens, total_tokens = _extract_usage(result)
         duration_s = perf_counter() - start_time
         logfire.info("pdfmder.llm.page_done", chars=len(md))
+        if cache_dir is not None:
+            _write_cached_markdown(cache_dir, cache_key, model_name, md)
         return (
-            md.strip() + "\n",
+            md,
             PageMetrics(
                 model=model_name,
                 input_tokens=input_tokens,
@@ -279,3 +576,202 @@ def convert_to_markdown(
                 fallback=False,
             ),
         )
+
+
+PAGE_BREAK = "<<<PAGE_BREAK>>>"
+
+
+@dataclass(frozen=True)
+class PageInput:
+    """One page of a batch: its text layer and encoded page image, if rendered."""
+
+    text: str
+    image: bytes | None
+
+
+def _split_evenly(value: int | None, n: int) -> list[int | None]:
+    # Per-page share of a batch total; the remainder goes to the first page so the
+    # per-page values still add up to the total.
+    if value is None:
+        return [None] * n
+    share, remainder = divmod(value, n)
+    return [share + remainder] + [share] * (n - 1)
+
+
+def _split_batch_output(output: str, n: int) -> list[str] | None:
+    blocks = output.split(PAGE_BREAK)
+    if len(blocks) == n + 1 and not blocks[-1].strip():
+        blocks.pop()
+    if len(blocks) != n:
+        return None
+    return [block.strip() + "\n" for block in blocks]
+
+
+async def convert_pages_batch(
+    pages: list[PageInput],
+    *,
+    prev_text: str | None,
+    next_text: str | None,
+    prev_markdown: str | None,
+    config: LLMConfig | None = None,
+) -> list[tuple[str, PageMetrics]] | PageMetrics:
+    """Convert several adjacent pages to Markdown in a single LLM call.
+
+    The model is asked for one Markdown block per page, separated by `PAGE_BREAK`,
+    which amortises the fixed prompt over the batch. Token usage and duration are
+    split evenly across the pages.
+
+    When the batch cannot be used (no credentials, an LLM error, or a response with
+    the wrong number of blocks) the metrics of the aborted call are returned instead.
+    Callers then convert the pages one by one with `convert_to_markdown`, which also
+    owns the fallback behaviour, and add those metrics with `add_batch_cost`.
+    """
+    if config is None:
+        config = LLMConfig.from_env()
+    model_name = config.model_name
+    n = len(pages)
+    start_time = perf_counter()
+
+    def aborted(input_tokens: int | None, output_tokens: int | None, total_tokens: int | None) -> PageMetrics:
+        return PageMetrics(
+            model=model_name,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=total_tokens,
+            duration_s=perf_counter() - start_time,
+            fallback=True,
+        )
+
+    if config.compact_context:
+        if prev_markdown:
+            prev_markdown = prev_markdown[-_COMPACT_PREV_MARKDOWN_CHARS:]
+        if prev_text:
+            prev_text = prev_text[-_COMPACT_NEIGHBOUR_TEXT_CHARS:]
+        if next_text:
+            next_text = next_text[:_COMPACT_NEIGHBOUR_TEXT_CHARS]
+
+    if config.missing_credentials is not None:
+        return aborted(None, None, None)
+
+    agent = _make_agent(model_name, config.temperature, config.max_tokens, config.concurrency)
+
+    def build_section(title: str, body: str | None) -> str:
+        value = body if body else "None"
+        return f"## {title}\n{value}"
+
+    instructions = (
+        f"This request contains {n} consecutive current pages. Convert each of them, in "
+        f"order, and separate the {n} Markdown blocks with a line containing only {PAGE_BREAK}."
+    )
+    prompt = "\n\n".join(
+        (
+            instructions,
+            build_section("Previous Page Markdown", prev_markdown),
+            build_section("Previous Page Text", prev_text),
+            *(build_section(f"Page {k} Text", page.text) for k, page in enumerate(pages, start=1)),
+            build_section("Next Page Text", next_text),
+        )
+    )
+    parts: list[str | BinaryContent] = [prompt]
+
+    # As for single pages, images only go along for scanned pages unless overridden.
+    for k, page in enumerate(pages, start=1):
+        if page.image is not None and (config.always_send_images or is_scanned_page(page.text)):
+            parts.append(f"\n\nPAGE {k} IMAGE:\n")
+            parts.append(_image_content(page.image))
+
+    cache_dir = _cache_dir()
+    cache_key = _cache_key(config, parts) if cache_dir is not None else ""
+    if cache_dir is not None:
+        cached = _read_cached_markdown(cache_dir, cache_key)
+        blocks = _split_batch_output(cached, n) if cached is not None else None
+        if blocks is not None:
+            logfire.info("pdfmder.llm.cache_hit", model=model_name, pages=n)
+            metrics = PageMetrics(
+                model=model_name,
+                input_tokens=0,
+                output_tokens=0,
+                total_tokens=0,
+                duration_s=(perf_counter() - start_time) / n,
+                fallback=False,
+            )
+            return [(md, metrics) for md in blocks]
+
+    with logfire.span("pdfmder.llm.convert_pages_batch", model=model_name, pages=n):
+        try:
+            result = await _run_agent_with_retry(agent, parts)
+        except Exception as exc:  # noqa: BLE001
+            logfire.warning("pdfmder.llm.batch_failed", reason="llm_error", model=model_name, error=str(exc))
+            # Usage is unknown for a failed call; only its time is counted.
+            return aborted(None, None, None)
+
+        output = result.output
+        input_tokens, output_tokens, total_tokens = _extract_usage(result)
+        blocks = _split_batch_output(output, n)
+        if blocks is None:
+            logfire.warning(
+                "pdfmder.llm.batch_failed",
+                reason="page_count_mismatch",
+                model=model_name,
+                pages=n,
+                blocks=output.count(PAGE_BREAK) + 1,
+            )
+            return aborted(input_tokens, output_tokens, total_tokens)
+
+        duration_s = (perf_counter() - start_time) / n
+        logfire.info("pdfmder.llm.batch_done", pages=n, chars=len(output))
+        if cache_dir is not None:
+            _write_cached_markdown(cache_dir, cache_key, model_name, output)
+
+        return [
+            (
+                md,
+                PageMetrics(
+                    model=model_name,
+                    input_tokens=page_input,
+                    output_tokens=page_output,
+                    total_tokens=page_total,
+                    duration_s=duration_s,
+                    fallback=False,
+                ),
+            )
+            for md, page_input, page_output, page_total in zip(
+                blocks,
+                _split_evenly(input_tokens, n),
+                _split_evenly(output_tokens, n),
+                _split_evenly(total_tokens, n),
+                strict=True,
+            )
+        ]
+
+
+def add_batch_cost(results: list[tuple[str, PageMetrics]], cost: PageMetrics) -> list[tuple[str, PageMetrics]]:
+    """Spread the tokens and time of an aborted batch call evenly over its pages."""
+    n = len(results)
+
+    def add(value: int | None, extra: int | None) -> int | None:
+        if value is None:
+            return extra
+        if extra is None:
+            return value
+        return value + extra
+
+    return [
+        (
+            md,
+            replace(
+                metrics,
+                input_tokens=add(metrics.input_tokens, extra_input),
+                output_tokens=add(metrics.output_tokens, extra_output),
+                total_tokens=add(metrics.total_tokens, extra_total),
+                duration_s=metrics.duration_s + cost.duration_s / n,
+            ),
+        )
+        for (md, metrics), extra_input, extra_output, extra_total in zip(
+            results,
+            _split_evenly(cost.input_tokens, n),
+            _split_evenly(cost.output_tokens, n),
+            _split_evenly(cost.total_tokens, n),
+            strict=True,
+        )
+    ]
@@ -2,14 +2,116 @@
 
 from __future__ import annotations
 
+import codecs
+import ctypes
+import os
 from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
+from itertools import repeat
 from pathlib import Path
 
 import logfire
 import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
 
-from pdfmder.pdfium_images import render_pdf_pages_to_images_tmp
+from pdfmder.pdfium_images import render_page
+from pdfmder.pdfium_markdown import try_direct_markdown
+
+# PDFium is not thread-safe (not even across separate documents), so the render + text
+# pass runs in worker processes that each open their own copy of the document. Below
+# this page count the process start-up cost outweighs the gain.
+_PARALLEL_MIN_PAGES = 8
+
+# Pages whose text layer has fewer characters than this are treated as scanned: the
+# image is their only real content. Pages with a text layer are converted from text.
+_SCANNED_PAGE_MAX_CHARS = 50
+
+
+def is_scanned_page(text: str) -> bool:
+    """True when a page's text layer is (nearly) empty, so only its image has content."""
+    return len(text.strip()) < _SCANNED_PAGE_MAX_CHARS
+
+
+class _TextBuffer:
+    """UTF-16 buffer for `FPDFText_GetText`, reused across pages and grown as needed.
+
+    `get_text_range` allocates a fresh buffer per page and copies it out once more
+    before decoding; here the text is decoded straight from the shared buffer.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ctypes.create_string_buffer(0)
+
+    def read(self, textpage: pdfium.PdfTextPage) -> str:
+        n_chars = textpage.count_chars()
+        if n_chars <= 0:
+            return ""
+        size = (n_chars + 1) * 2  # UTF-16 code units plus the NUL terminator
+        if len(self._buffer) < size:
+            self._buffer = ctypes.create_string_buffer(size)
+        written = pdfium_c.FPDFText_GetText(
+            textpage, 0, n_chars, ctypes.cast(self._buffer, ctypes.POINTER(ctypes.c_ushort))
+        )
+        if written <= 1:
+            return ""
+        return codecs.decode(memoryview(self._buffer)[: (written - 1) * 2], "utf-16-le", "ignore")
+
+
+def _page_assets(
+    pdf: pdfium.PdfDocument,
+    index: int,
+    buffer: _TextBuffer,
+    *,
+    dpi: int,
+    image_format: str,
+    max_side: int | None,
+    all_images: bool,
+    direct_markdown: bool,
+) -> tuple[bytes | None, str, str | None]:
+    # Loading a page (content stream, resources) is the expensive step, so render,
+    # extract text and try direct markdown on the same page object before releasing it.
+    page = pdf[index]
+    try:
+        textpage = page.get_textpage()
+        try:
+            text = buffer.read(textpage)
+            direct_md = try_direct_markdown(page, textpage) if direct_markdown else None
+        finally:
+            textpage.close()
+        image = None
+        if all_images or is_scanned_page(text):
+            image = render_page(page, dpi=dpi, image_format=image_format, max_side=max_side)
+        return image, text, direct_md
+    finally:
+        page.close()
+
+
+def _page_assets_range(
+    pdf_path: str,
+    start: int,
+    stop: int,
+    dpi: int,
+    image_format: str,
+    max_side: int | None,
+    all_images: bool,
+    direct_markdown: bool,
+) -> list[tuple[bytes | None, str, str | None]]:
+    buffer = _TextBuffer()
+    with pdfium.PdfDocument(pdf_path) as pdf:
+        return [
+            _page_assets(
+                pdf,
+                i,
+                buffer,
+                dpi=dpi,
+                image_format=image_format,
+                max_side=max_side,
+                all_images=all_images,
+                direct_markdown=direct_markdown,
+            )
+            for i in range(start, stop)
+        ]
 
 
 @contextmanager
@@ -17,31 +119,101 @@ def extract_pdf_assets_tmp(
     pdf_path: Path,
     *,
     dpi: int = 150,
-) -> Iterator[tuple[list[Path], list[str], int]]:
-    """Extract per-page assets from a PDF, keeping temporary images alive.
+    image_format: str = "auto",
+    max_side: int | None = 1568,
+    workers: int | None = None,
+    all_images: bool = True,
+    neighbour_images: bool = True,
+    direct_markdown: bool = False,
+) -> Iterator[tuple[list[bytes | None], list[str], list[str | None], int]]:
+    """Extract per-page assets from a PDF.
 
     Returns:
-        (image_paths, page_texts, page_count)
+        (page_images, page_texts, direct_pages, page_count)
 
-    The image paths point to files in a temporary directory. They are valid only
-    while inside the context manager.
+    Page images are encoded in memory, ready to send to the LLM without a
+    temporary-file round-trip. By default text-only pages are PNG and other pages
+    JPEG. Their longer side is capped at `max_side` pixels (1568 matches the vision
+    tile limits of the major providers); pass None to keep the full `dpi` resolution.
 
-    Text extraction uses the PDF text layer (no OCR).
+    With `all_images=False` only scanned pages (see `is_scanned_page`) are rendered,
+    plus their neighbours when `neighbour_images` is set; the other entries of
+    `page_images` are None.
+
+    Text extraction uses the PDF text layer (no OCR). With `direct_markdown=True`,
+    `direct_pages` holds `try_direct_markdown` for each page; otherwise all None.
+
+    Each page is loaded once for rendering, text extraction and direct markdown. Documents with
+    several pages are split into contiguous page ranges processed by `workers`
+    processes (default: CPU count), each opening `pdf_path` itself.
     """
     pdf_path = Path(pdf_path)
 
-    with logfire.span("pdfmder.extract_pdf_assets_tmp", pdf_path=str(pdf_path), dpi=dpi):
-        with render_pdf_pages_to_images_tmp(pdf_path, dpi=dpi) as (image_paths, _pil_images, page_count):
-            pdf = pdfium.PdfDocument(str(pdf_path))
-            page_texts: list[str] = []
+    with logfire.span("pdfmder.extract_pdf_assets_tmp", pdf_path=str(pdf_path), dpi=dpi, max_side=max_side):
+        with pdfium.PdfDocument(str(pdf_path)) as pdf:
+            page_count = len(pdf)
+            workers = min(workers or os.cpu_count() or 1, page_count)
+            if workers <= 1 or page_count < _PARALLEL_MIN_PAGES:
+                buffer = _TextBuffer()
+                assets = [
+                    _page_assets(
+                        pdf,
+                        i,
+                        buffer,
+                        dpi=dpi,
+                        image_format=image_format,
+                        max_side=max_side,
+                        all_images=all_images,
+                        direct_markdown=direct_markdown,
+                    )
+                    for i in range(page_count)
+                ]
+            else:
+                chunk = -(-page_count // workers)
+                starts = range(0, page_count, chunk)
+                stops = [min(start + chunk, page_count) for start in starts]
+
+                with logfire.span("pdfmder.extract_pdf_assets_parallel", pages=page_count, workers=len(starts)):
+                    with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+                        ranges = executor.map(
+                            _page_assets_range,
+                            repeat(str(pdf_path)),
+                            starts,
+                            stops,
+                            repeat(dpi),
+                            repeat(image_format),
+                            repeat(max_side),
+                            repeat(all_images),
+                            repeat(direct_markdown),
+                        )
+                        assets = [asset for page_assets in ranges for asset in page_assets]
+
+            page_images = [image for image, _, _ in assets]
+            page_texts = [text for _, text, _ in assets]
+            direct_pages = [direct_md for _, _, direct_md in assets]
+
+            if not all_images and neighbour_images:
+                # Scanned pages are sent with their neighbours' images too; these are
+                # only known once every page's text is in, so render them afterwards.
+                scanned = [is_scanned_page(text) for text in page_texts]
+                for i in range(page_count):
+                    if page_images[i] is None and any(scanned[max(i - 1, 0) : i + 2]):
+                        page = pdf[i]
+                        try:
+                            page_images[i] = render_page(page, dpi=dpi, image_format=image_format, max_side=max_side)
+                        finally:
+                            page.close()
 
-            for i in range(page_count):
-                page = pdf[i]
-                textpage = page.get_textpage()
-                page_texts.append(textpage.get_text_range())
+        logfire.info(
+            "pdfmder.extract_pdf_assets.rendered",
+            pages=page_count,
+            images=sum(image is not None for image in page_images),
+            direct=sum(md is not None for md in direct_pages),
+        )
 
-            # Invariant: one entry per page.
-            assert len(image_paths) == page_count
-            assert len(page_texts) == page_count
+        # Invariant: one entry per page.
+        assert len(page_images) == page_count
+        assert len(page_texts) == page_count
+        assert len(direct_pages) == page_count
 
-            yield image_paths, page_texts, page_count
+        yield page_images, page_texts, direct_pages, page_count
@@ -1,55 +1,87 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
-from contextlib import contextmanager
+import io
 from pathlib import Path
-from tempfile import TemporaryDirectory
 
-import logfire
 import pypdfium2 as pdfium
 from PIL import Image
 
+_JPEG_QUALITY = 85
+# zlib level 1: PNGs only live in memory for one upload, so encode speed beats size.
+_PNG_COMPRESS_LEVEL = 1
 
-@contextmanager
-def render_pdf_pages_to_images_tmp(
-    pdf_path: Path,
-    *,
-    dpi: int = 150,
-    image_format: str = "png",
-) -> Iterator[tuple[list[Path], list[Image.Image], int]]:
-    """Render each page of a PDF to an image in a temporary folder.
 
-    Returns:
-        (image_paths, pil_images, page_count)
+# image_format="auto": pages whose thumbnail has few distinct (coarsely quantised)
+# colours are text, rules and tables; they stay lossless PNG so glyphs and grid lines
+# remain crisp. Everything else (photos, scans) becomes JPEG.
+_FLAT_PAGE_SAMPLE_SIDE = 256
+_FLAT_PAGE_MAX_COLORS = 64
 
-    The temporary folder is cleaned up automatically when the context exits.
 
-    Notes:
-        - This is PDF *rendering* (page → pixels), not text extraction.
-        - Paths are only valid while inside the context manager.
-    """
-    pdf_path = Path(pdf_path)
+def _is_flat_page(pil: Image.Image) -> bool:
+    # Downscale the (RGBX) page before converting, so only the small sample is copied;
+    # thumbnail() would resize the caller's image in place.
+    scale = min(_FLAT_PAGE_SAMPLE_SIDE / max(pil.size), 1.0)
+    size = (max(round(pil.width * scale), 1), max(round(pil.height * scale), 1))
+    sample = pil.resize(size, Image.Resampling.BICUBIC, reducing_gap=2.0).convert("RGB")
+    sample = sample.point(lambda v: v & 0xF0)
+    return sample.getcolors(maxcolors=_FLAT_PAGE_MAX_COLORS) is not None
+
 
-    with logfire.span("pdfmder.render_pages", pdf_path=str(pdf_path), dpi=dpi, image_format=image_format):
-        pdf = pdfium.PdfDocument(str(pdf_path))
-        page_count = len(pdf)
+def _encode_page(pil: Image.Image, image_format: str) -> bytes:
+    fmt = image_format.lower()
+    if fmt == "auto":
+        fmt = "png" if _is_flat_page(pil) else "jpeg"
 
-        with TemporaryDirectory(prefix="pdfmder-") as tmp:
-            tmp_dir = Path(tmp)
-            image_paths: list[Path] = []
-            pil_images: list[Image.Image] = []
+    buf = io.BytesIO()
+    if fmt in {"jpeg", "jpg"}:
+        # The JPEG encoder reads RGBX directly, so a bitmap-backed image is never copied.
+        pil.save(buf, format="JPEG", quality=_JPEG_QUALITY, optimize=True)
+        return buf.getvalue()
 
-            scale = dpi / 72.0
+    if pil.mode == "RGBX":
+        pil = pil.convert("RGB")
+    if fmt == "png":
+        pil.save(buf, format="PNG", compress_level=_PNG_COMPRESS_LEVEL)
+    else:
+        pil.save(buf, format=fmt)
+    return buf.getvalue()
 
-            for i in range(page_count):
-                page = pdf[i]
-                bitmap = page.render(scale=scale)
-                pil = bitmap.to_pil()
 
-                out_path = tmp_dir / f"page-{i + 1:04d}.{image_format}"
-                pil.save(out_path)
+def render_page(
+    page: pdfium.PdfPage,
+    *,
+    dpi: int = 150,
+    image_format: str = "png",
+    max_side: int | None = None,
+) -> bytes:
+    """Render one loaded page to encoded image bytes; the caller owns (and closes) `page`."""
+    scale = dpi / 72.0
+    if max_side:
+        scale = min(scale, max_side / max(page.get_size()))
+    # Render straight to RGBX: to_pil() then wraps the PDFium buffer without a copy or
+    # a BGR -> RGB channel swap. The image is only valid until the bitmap is closed.
+    bitmap = page.render(scale=scale, rev_byteorder=True, prefer_bgrx=True)
+    try:
+        return _encode_page(bitmap.to_pil(), image_format)
+    finally:
+        bitmap.close()
 
-                image_paths.append(out_path)
-                pil_images.append(pil)
 
-            yield image_paths, pil_images, page_count
+def write_page_images(page_images: list[bytes | None], out_dir: Path) -> list[Path]:
+    """Write in-memory page images to `out_dir` (for debugging what the LLM sees).
+
+    Files are named `page-0001.png` / `page-0001.jpg` after their encoded format;
+    pages without an image (None) are skipped.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: list[Path] = []
+    for i, data in enumerate(page_images):
+        if data is None:
+            continue
+        suffix = "png" if data.startswith(b"\x89PNG") else "jpg"
+        out_path = out_dir / f"page-{i + 1:04d}.{suffix}"
+        out_path.write_bytes(data)
+        paths.append(out_path)
+    return paths
@@ -0,0 +1,162 @@
+"""Direct Markdown for plain-text pages, without an LLM call."""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+# A page qualifies only when it is nothing but a single column of text: any path
+# (table rules, boxes), image or form object sends it to the LLM instead.
+_MIN_CHARS = 50
+_MAX_BAD_CHAR_RATIO = 0.01
+# Lines whose font is this much larger than the body text become headings.
+_HEADING_SIZE_RATIO = 1.15
+_MAX_HEADING_CHARS = 120
+# Text runs on the same line separated by more than this many line heights are
+# columns or table cells.
+_COLUMN_GAP_LINE_HEIGHTS = 2.0
+
+_BULLET_RE = re.compile(r"^[•◦▪‣∙·\-–*]\s+")
+_ORDERED_RE = re.compile(r"^\d+[.)]\s+")
+# Plain text that Markdown would otherwise read as markup: escapes, emphasis, code,
+# links and HTML anywhere, and headings, quotes, tables, lists or setext underlines
+# at the start of a line.
+_INLINE_MARKUP_RE = re.compile(r"[\\`*_\[<]")
+_LEADING_MARKUP_RE = re.compile(r"^(?=[#>|+\-=])|^\d+(?=[.)](?:\s|$))")
+
+
+def _escape_text(text: str) -> str:
+    text = _INLINE_MARKUP_RE.sub(r"\\\g<0>", text)
+    return _LEADING_MARKUP_RE.sub(r"\g<0>\\", text, count=1)
+
+
+@dataclass(frozen=True)
+class _Line:
+    text: str
+    size: float
+    top: float
+    bottom: float
+
+
+def _text_lines(textpage: pdfium.PdfTextPage) -> list[_Line] | None:
+    n_chars = textpage.count_chars()
+    if n_chars < _MIN_CHARS:
+        return None
+
+    lines: list[_Line] = []
+    chars: list[str] = []
+    size, top, bottom = 0.0, float("-inf"), float("inf")
+    bad = 0
+
+    def end_line() -> None:
+        text = "".join(chars).strip()
+        if text:
+            lines.append(_Line(text=text, size=size, top=top, bottom=bottom))
+        chars.clear()
+
+    for i in range(n_chars):
+        code = pdfium_c.FPDFText_GetUnicode(textpage, i)
+        if code in (0, 0xFFFD):
+            bad += 1
+            continue
+        char = chr(code)
+        if char == "\r":
+            continue
+        if char == "\n":
+            end_line()
+            size, top, bottom = 0.0, float("-inf"), float("inf")
+            continue
+        chars.append(char)
+        if not char.isspace():
+            size = max(size, pdfium_c.FPDFText_GetFontSize(textpage, i))
+            _left, char_bottom, _right, char_top = textpage.get_charbox(i)
+            top, bottom = max(top, char_top), min(bottom, char_bottom)
+    end_line()
+
+    if bad > n_chars * _MAX_BAD_CHAR_RATIO:
+        return None
+    return lines
+
+
+def _is_single_column(textpage: pdfium.PdfTextPage) -> bool:
+    rects = [textpage.get_rect(i) for i in range(textpage.count_rects())]
+    for a, (a_left, a_bottom, a_right, a_top) in enumerate(rects):
+        a_height = a_top - a_bottom
+        for b_left, b_bottom, b_right, b_top in rects[a + 1 :]:
+            overlap = min(a_top, b_top) - max(a_bottom, b_bottom)
+            if overlap <= 0.5 * min(a_height, b_top - b_bottom):
+                continue
+            gap = max(a_left, b_left) - min(a_right, b_right)
+            if gap > _COLUMN_GAP_LINE_HEIGHTS * max(a_height, b_top - b_bottom):
+                return False
+    return True
+
+
+def _format_lines(lines: list[_Line]) -> str:
+    weights = Counter[float]()
+    for line in lines:
+        weights[round(line.size * 2) / 2] += len(line.text)
+    body_size = weights.most_common(1)[0][0]
+    heading_sizes = sorted({size for size in weights if size > body_size * _HEADING_SIZE_RATIO}, reverse=True)
+    heading_level = {size: min(level, 6) for level, size in enumerate(heading_sizes, start=1)}
+
+    # (markdown, is_list_item) per block
+    blocks: list[tuple[str, bool]] = []
+    paragraph: list[str] = []
+    prev: _Line | None = None
+
+    def end_paragraph() -> None:
+        if paragraph:
+            blocks.append((" ".join(paragraph), False))
+            paragraph.clear()
+
+    for line in lines:
+        level = heading_level.get(round(line.size * 2) / 2)
+        if level is not None and len(line.text) <= _MAX_HEADING_CHARS:
+            end_paragraph()
+            blocks.append((f"{'#' * level} {_escape_text(line.text)}", False))
+        elif bullet := _BULLET_RE.match(line.text):
+            end_paragraph()
+            blocks.append((f"- {_escape_text(line.text[bullet.end() :])}", True))
+        elif ordered := _ORDERED_RE.match(line.text):
+            end_paragraph()
+            blocks.append((f"{ordered[0]}{_escape_text(line.text[ordered.end() :])}", True))
+        else:
+            # A vertical gap wider than most of a line height starts a new paragraph.
+            if prev is not None and prev.bottom - line.top > 0.8 * line.size:
+                end_paragraph()
+            paragraph.append(_escape_text(line.text))
+        prev = line
+    end_paragraph()
+
+    # Keep consecutive list items together; other blocks are separated by a blank line.
+    parts: list[str] = []
+    prev_item = False
+    for block, is_item in blocks:
+        if parts:
+            parts.append("\n" if is_item and prev_item else "\n\n")
+        parts.append(block)
+        prev_item = is_item
+    return "".join(parts) + "\n"
+
+
+def try_direct_markdown(page: pdfium.PdfPage, textpage: pdfium.PdfTextPage) -> str | None:
+    """Markdown for a loaded page built from its text layer and font sizes, or None.
+
+    Only pages that are a single column of clean text (no path, image or form
+    objects) qualify; headings are inferred from font sizes and bullet or numbered
+    lines become list items. Every other page returns None and goes to the LLM.
+    The caller owns (and closes) `page` and `textpage`.
+    """
+    if any(obj.type != pdfium_c.FPDF_PAGEOBJ_TEXT for obj in page.get_objects(max_depth=1)):
+        return None
+    if not _is_single_column(textpage):
+        return None
+    lines = _text_lines(textpage)
+    if not lines:
+        return None
+    return _format_lines(lines)
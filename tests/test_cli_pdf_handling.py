@@ -5,7 +5,8 @@ from pathlib import Path
 import typer
 from typer.testing import CliRunner
 
-from pdfmder.cli import cli
+from pdfmder.cli import _next_free_path, cli
+from pdfmder.llm_markdown import PageMetrics
 
 app = typer.Typer(add_completion=False)
 app.command()(cli)
@@ -45,10 +46,23 @@ def test_happy_path_writes_output_file(tmp_path: Path, monkeypatch) -> None:
     We stub the LLM call to avoid network access during tests.
     """
 
-    def fake_convert_to_markdown(**_kwargs) -> str:
-        return "# Page\n\nHello\n"
+    metrics = PageMetrics(
+        model="fake",
+        input_tokens=None,
+        output_tokens=None,
+        total_tokens=None,
+        duration_s=0.0,
+        fallback=False,
+    )
+
+    async def fake_convert_to_markdown(**_kwargs) -> tuple[str, PageMetrics]:
+        return "# Page\n\nHello\n", metrics
+
+    async def fake_convert_pages_batch(pages: list[object], **_kwargs) -> list[tuple[str, PageMetrics]]:
+        return [("# Page\n\nHello\n", metrics)] * len(pages)
 
     monkeypatch.setattr("pdfmder.converter.convert_to_markdown", fake_convert_to_markdown)
+    monkeypatch.setattr("pdfmder.converter.convert_pages_batch", fake_convert_pages_batch)
 
     project_root = Path(__file__).resolve().parents[1]
     ensure_test_pdf(project_root)
@@ -65,3 +79,14 @@ def test_happy_path_writes_output_file(tmp_path: Path, monkeypatch) -> None:
     produced = out_path.read_text(encoding="utf-8").strip()
     assert produced
     assert "# Page" in produced
+
+
+def test_next_free_path_skips_existing_numbered_outputs(tmp_path: Path) -> None:
+    out_path = tmp_path / "doc.md"
+    assert _next_free_path(out_path) == out_path
+
+    out_path.write_text("x", encoding="utf-8")
+    (tmp_path / "doc-1.md").write_text("x", encoding="utf-8")
+    (tmp_path / "doc-2.md").write_text("x", encoding="utf-8")
+
+    assert _next_free_path(out_path) == tmp_path / "doc-3.md"
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from pdfmder.converter import _join_pages, _page_spans
+
+
+def test_join_pages_separates_pages_and_skips_empty_ones() -> None:
+    joined = _join_pages(["# One\n", "\n\n", "Two\n\n"])
+    assert joined == "# One\n\n---\n\nTwo\n"
+
+
+def test_join_pages_without_content_is_a_single_newline() -> None:
+    assert _join_pages([]) == "\n"
+    assert _join_pages(["\n"]) == "\n"
+
+
+def test_page_spans_batch_llm_pages_and_isolate_direct_pages() -> None:
+    assert _page_spans([False] * 5, 2) == [(0, 2), (2, 4), (4, 5)]
+    assert _page_spans([False, True, False, False, False], 2) == [(0, 1), (1, 2), (2, 4), (4, 5)]
+    assert _page_spans([True, True], 4) == [(0, 1), (1, 2)]
+    assert _page_spans([], 4) == []
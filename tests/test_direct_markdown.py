@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from pdfmder.pdfium_extract import extract_pdf_assets_tmp
+
+
+def _write_pdf(path: Path) -> None:
+    c = canvas.Canvas(str(path), pagesize=letter)
+
+    # Page 1: a single column of text with headings and a bullet list.
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(72, 720, "Quarterly Report")
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 684, "Revenue grew in every region during the quarter, led by strong demand")
+    c.drawString(72, 670, "for the new product line and steady renewals.")
+    c.setFont("Helvetica-Bold", 15)
+    c.drawString(72, 628, "Highlights")
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 604, "• Margins improved by two points")
+    c.drawString(72, 590, "• Headcount stayed flat")
+    c.showPage()
+
+    # Page 2: two columns.
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 720, "Left column text that is long enough")
+    c.drawString(340, 720, "Right column text that is long too")
+    c.showPage()
+
+    # Page 3: text with a ruled line, as in tables.
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 720, "A caption above a rule, long enough to count as a page.")
+    c.line(72, 710, 540, 710)
+    c.showPage()
+
+    # Page 4: plain text that would read as Markdown markup.
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(72, 720, "Use of *args in __init__")
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 690, "# of units sold rose, see note_1 and the *starred* rows.")
+    c.drawString(72, 660, "> 40% of revenue came from renewals in the quarter.")
+    c.drawString(72, 630, "+ plus line with <div>, `code` and [link](x) in C:\\temp.")
+    c.drawString(72, 600, "-40 degrees was the coldest reading of the year.")
+    c.drawString(72, 570, "= totals are restated below.")
+    c.drawString(72, 540, "• item with **bold** markers and snake_case_name")
+    c.drawString(72, 526, "2. step with `code` and <b>html</b>")
+    c.showPage()
+    c.save()
+
+
+def _direct_pages(pdf_path: Path) -> list[str | None]:
+    with extract_pdf_assets_tmp(pdf_path, dpi=72, direct_markdown=True) as (_images, _texts, direct_pages, _count):
+        return direct_pages
+
+
+def test_only_plain_single_column_pages_get_direct_markdown(tmp_path: Path) -> None:
+    pdf_path = tmp_path / "plain.pdf"
+    _write_pdf(pdf_path)
+
+    first, two_columns, ruled, _markup = _direct_pages(pdf_path)
+
+    assert first == (
+        "# Quarterly Report\n\n"
+        "Revenue grew in every region during the quarter, led by strong demand "
+        "for the new product line and steady renewals.\n\n"
+        "## Highlights\n\n"
+        "- Margins improved by two points\n"
+        "- Headcount stayed flat\n"
+    )
+    assert two_columns is None
+    assert ruled is None
+
+
+def test_direct_markdown_escapes_text_that_reads_as_markup(tmp_path: Path) -> None:
+    pdf_path = tmp_path / "plain.pdf"
+    _write_pdf(pdf_path)
+
+    markup = _direct_pages(pdf_path)[3]
+
+    assert markup == (
+        "# Use of \\*args in \\_\\_init\\_\\_\n\n"
+        "\\# of units sold rose, see note\\_1 and the \\*starred\\* rows.\n\n"
+        "\\> 40% of revenue came from renewals in the quarter.\n\n"
+        "\\+ plus line with \\<div>, \\`code\\` and \\[link](x) in C:\\\\temp.\n\n"
+        "\\-40 degrees was the coldest reading of the year.\n\n"
+        "\\= totals are restated below.\n\n"
+        "- item with \\*\\*bold\\*\\* markers and snake\\_case\\_name\n"
+        "2. step with \\`code\\` and \\<b>html\\</b>\n"
+    )
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+import httpx
+import pytest
+from openai import APIStatusError
+from pydantic_ai import ModelHTTPError
+from pydantic_ai.messages import BinaryContent
+
+from pdfmder.llm_markdown import (
+    PAGE_BREAK,
+    LLMConfig,
+    PageInput,
+    PageMetrics,
+    _cache_dir,
+    _cache_key,
+    _env_int,
+    _extract_usage,
+    _is_retryable,
+    _retry_after_s,
+    _usage_accessors,
+    add_batch_cost,
+    convert_pages_batch,
+    convert_to_markdown,
+)
+
+
+@dataclass
+class FakeUsage:
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+
+
+class FakeRunResult:
+    def __init__(self, usage: FakeUsage) -> None:
+        self._usage = usage
+
+    def usage(self) -> FakeUsage:
+        return self._usage
+
+
+class FakePageResult(FakeRunResult):
+    def __init__(self, output: str) -> None:
+        super().__init__(FakeUsage(11, 5, 16))
+        self.output = output
+
+
+@pytest.fixture
+def fake_llm(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> list[list[str | BinaryContent]]:
+    """Replace the model call: record each request's parts and answer with the scripted
+    outputs (indirect parameter, default one page) in order, repeating the last one."""
+    outputs: list[str] = list(getattr(request, "param", ["# Page\n"]))
+    monkeypatch.setenv("PDFMDER_CACHE", "0")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("AZURE_OPENAI_ENDPOINT", raising=False)
+
+    sent: list[list[str | BinaryContent]] = []
+
+    async def fake_run(_agent: object, parts: list[str | BinaryContent]) -> FakePageResult:
+        output = outputs[min(len(sent), len(outputs) - 1)]
+        sent.append(parts)
+        return FakePageResult(output)
+
+    monkeypatch.setattr("pdfmder.llm_markdown._run_agent_with_retry", fake_run)
+    return sent
+
+
+class FakeDumpResult:
+    def model_dump(self) -> dict[str, object]:
+        return {"usage": {"prompt_tokens": 7, "completion_tokens": 3}}
+
+
+def test_extract_usage_remembers_accessor_per_result_type() -> None:
+    _usage_accessors.clear()
+
+    assert _extract_usage(FakeRunResult(FakeUsage(10, 5, 15))) == (10, 5, 15)
+    assert _extract_usage(FakeRunResult(FakeUsage(1, 2, 3))) == (1, 2, 3)
+    assert _extract_usage(FakeDumpResult()) == (7, 3, None)
+    assert set(_usage_accessors) == {FakeRunResult, FakeDumpResult}
+
+
+def test_extract_usage_without_usage_returns_none() -> None:
+    assert _extract_usage(object()) == (None, None, None)
+
+
+def test_page_response_is_served_from_disk_cache(tmp_path: Path, monkeypatch, fake_llm) -> None:
+    monkeypatch.setenv("PDFMDER_CACHE", "1")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    convert_page = partial(
+        convert_to_markdown,
+        prev_text=None,
+        prev_image=None,
+        curr_text="Cached",
+        curr_image=b"\x89PNG fake",
+        next_text=None,
+        next_image=None,
+        prev_markdown=None,
+    )
+    first_md, first_metrics = asyncio.run(convert_page())
+    second_md, second_metrics = asyncio.run(convert_page())
+
+    assert len(fake_llm) == 1
+    assert first_md == second_md == "# Page\n"
+    assert first_metrics.total_tokens == 16
+    assert second_metrics.total_tokens == 0
+    assert len(list((tmp_path / "pdfmder").glob("*.json"))) == 1
+
+
+@pytest.mark.parametrize("value", ["", "0", "false", "no"])
+def test_disk_cache_is_opt_in(monkeypatch, value: str) -> None:
+    monkeypatch.setenv("PDFMDER_CACHE", value)
+    assert _cache_dir() is None
+
+
+def test_compact_context_mode_sends_only_the_current_image(monkeypatch, fake_llm) -> None:
+    monkeypatch.setenv("PDFMDER_CONTEXT_MODE", "compact")
+
+    asyncio.run(
+        convert_to_markdown(
+            prev_text="p" * 5000,
+            prev_image=b"\x89PNG prev",
+            curr_text="current",
+            curr_image=b"\x89PNG curr",
+            next_text="n" * 5000,
+            next_image=b"\x89PNG next",
+            prev_markdown=None,
+        )
+    )
+
+    (parts,) = fake_llm
+    images = [part for part in parts if isinstance(part, BinaryContent)]
+    assert [image.data for image in images] == [b"\x89PNG curr"]
+    prompt = parts[0]
+    assert isinstance(prompt, str)
+    assert "p" * 501 not in prompt
+    assert "n" * 501 not in prompt
+
+
+def test_images_are_sent_only_for_scanned_pages(monkeypatch, fake_llm) -> None:
+    monkeypatch.delenv("PDFMDER_ALWAYS_SEND_IMAGE", raising=False)
+
+    def convert(curr_text: str) -> None:
+        asyncio.run(
+            convert_to_markdown(
+                prev_text=None,
+                prev_image=None,
+                curr_text=curr_text,
+                curr_image=b"\x89PNG curr",
+                next_text=None,
+                next_image=None,
+                prev_markdown=None,
+            )
+        )
+
+    convert("A page with a proper text layer. " * 4)
+    convert("")
+    monkeypatch.setenv("PDFMDER_ALWAYS_SEND_IMAGE", "1")
+    convert("A page with a proper text layer. " * 4)
+
+    image_counts = [sum(isinstance(part, BinaryContent) for part in parts) for parts in fake_llm]
+    assert image_counts == [0, 1, 1]
+
+
+@pytest.mark.parametrize(
+    "fake_llm", [[f"# One\n{PAGE_BREAK}\n# Two\n{PAGE_BREAK}\n", "# One and two, merged\n"]], indirect=True
+)
+def test_page_batch_is_split_on_the_sentinel_or_rejected(fake_llm) -> None:
+    pages = [PageInput(text="one", image=b"\x89PNG 1"), PageInput(text="two", image=b"\x89PNG 2")]
+
+    def convert() -> list[tuple[str, PageMetrics]] | PageMetrics:
+        return asyncio.run(convert_pages_batch(pages, prev_text=None, next_text=None, prev_markdown=None))
+
+    converted = convert()
+    assert not isinstance(converted, PageMetrics)
+    assert [md for md, _ in converted] == ["# One\n", "# Two\n"]
+    assert [metrics.input_tokens for _, metrics in converted] == [6, 5]
+
+    # The rejected response's usage is reported so callers can count it.
+    rejected = convert()
+    assert isinstance(rejected, PageMetrics)
+    assert (rejected.input_tokens, rejected.output_tokens, rejected.fallback) == (11, 5, True)
+
+
+def test_aborted_batch_cost_is_spread_over_the_pages() -> None:
+    def metrics(tokens: int | None, duration_s: float) -> PageMetrics:
+        return PageMetrics(
+            model="gpt-5",
+            input_tokens=tokens,
+            output_tokens=tokens,
+            total_tokens=tokens,
+            duration_s=duration_s,
+            fallback=tokens is None,
+        )
+
+    results = [("# One\n", metrics(10, 1.0)), ("# Two\n", metrics(None, 0.5))]
+
+    charged = add_batch_cost(results, metrics(5, 3.0))
+
+    assert [md for md, _ in charged] == ["# One\n", "# Two\n"]
+    assert [m.input_tokens for _, m in charged] == [13, 2]
+    assert [m.duration_s for _, m in charged] == [2.5, 2.0]
+    assert add_batch_cost(results, metrics(None, 0.0)) == results
+
+
+def _wrapped_api_error(status_code: int, headers: dict[str, str]) -> ModelHTTPError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    try:
+        try:
+            raise APIStatusError("error", response=response, body=None)
+        except APIStatusError as err:
+            raise ModelHTTPError(status_code=status_code, model_name="gpt-5") from err
+    except ModelHTTPError as wrapped:
+        return wrapped
+
+
+def test_transient_errors_are_retried_honouring_retry_after() -> None:
+    rate_limited = _wrapped_api_error(429, {"retry-after": "3"})
+    assert _is_retryable(rate_limited)
+    assert _retry_after_s(rate_limited) == 3.0
+
+    overloaded = _wrapped_api_error(503, {"retry-after-ms": "250"})
+    assert _is_retryable(overloaded)
+    assert _retry_after_s(overloaded) == 0.25
+
+    unauthorized = _wrapped_api_error(401, {})
+    assert not _is_retryable(unauthorized)
+    assert _retry_after_s(unauthorized) is None
+    assert not _is_retryable(ValueError("bad output"))
+
+
+def test_llm_config_checks_credentials_once_up_front(monkeypatch) -> None:
+    monkeypatch.delenv("AZURE_OPENAI_ENDPOINT", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("PDFMDER_MODEL", "openai:gpt-4o-mini")
+
+    monkeypatch.setenv("PDFMDER_ALLOW_FALLBACK", "0")
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY must be set"):
+        LLMConfig.from_env()
+
+    monkeypatch.setenv("PDFMDER_ALLOW_FALLBACK", "1")
+    config = LLMConfig.from_env()
+    assert config.model_name == "gpt-4o-mini"
+    assert config.missing_credentials == "missing_openai_key"
+
+    md, metrics = asyncio.run(
+        convert_to_markdown(
+            prev_text=None,
+            prev_image=None,
+            curr_text="Plain\n\n\n\ntext",
+            curr_image=b"\x89PNG curr",
+            next_text=None,
+            next_image=None,
+            prev_markdown=None,
+            config=config,
+        )
+    )
+    assert md == "Plain\n\ntext\n"
+    assert metrics.fallback
+
+
+def test_cache_key_includes_sampling_settings() -> None:
+    parts: list[str | BinaryContent] = ["## Current Page Text\nHello"]
+    base = LLMConfig(model_name="gpt-4o")
+
+    keys = {
+        _cache_key(base, parts),
+        _cache_key(LLMConfig(model_name="gpt-4o", temperature=0.0), parts),
+        _cache_key(LLMConfig(model_name="gpt-4o", max_tokens=256), parts),
+    }
+
+    assert len(keys) == 3
+    assert _cache_key(LLMConfig(model_name="gpt-4o"), parts) == _cache_key(base, parts)
+
+
+def test_env_int_rejects_values_that_would_stall_or_crash(monkeypatch) -> None:
+    monkeypatch.delenv("PDFMDER_CONCURRENCY", raising=False)
+    assert _env_int("PDFMDER_CONCURRENCY", 8, minimum=1) == 8
+
+    monkeypatch.setenv("PDFMDER_CONCURRENCY", "3")
+    assert _env_int("PDFMDER_CONCURRENCY", 8, minimum=1) == 3
+
+    monkeypatch.setenv("PDFMDER_CONCURRENCY", "0")
+    with pytest.raises(RuntimeError, match="at least 1"):
+        _env_int("PDFMDER_CONCURRENCY", 8, minimum=1)
+
+    monkeypatch.setenv("PDFMDER_CONCURRENCY", "many")
+    with pytest.raises(RuntimeError, match="must be an integer"):
+        _env_int("PDFMDER_CONCURRENCY", 8, minimum=1)
+
+
+def test_llm_config_reads_the_page_settings(monkeypatch) -> None:
+    monkeypatch.setenv("PDFMDER_PAGE_BATCH", "4")
+    monkeypatch.setenv("PDFMDER_IMAGE_MAX", "0")
+
+    config = LLMConfig.from_env()
+
+    assert (config.page_batch, config.image_max) == (4, None)
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import pypdfium2 as pdfium
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
 from pdfmder.pdfium_extract import extract_pdf_assets_tmp
 
 
@@ -9,8 +13,62 @@ def test_extract_pdf_assets_lengths_equal_page_count() -> None:
     root = Path(__file__).resolve().parents[1]
     pdf_path = root / "data" / "test.pdf"
 
-    with extract_pdf_assets_tmp(pdf_path, dpi=72) as (image_paths, page_texts, page_count):
+    with extract_pdf_assets_tmp(pdf_path, dpi=72) as (page_images, page_texts, _direct_pages, page_count):
         assert page_count > 0
-        assert len(image_paths) == page_count
+        assert len(page_images) == page_count
         assert len(page_texts) == page_count
-        assert all(p.exists() for p in image_paths)
+        # data/test.pdf is text and tables only, so "auto" keeps every page as PNG.
+        assert all(image is not None and image.startswith(b"\x89PNG") for image in page_images)
+
+
+def test_extract_pdf_assets_parallel_matches_serial(monkeypatch) -> None:
+    root = Path(__file__).resolve().parents[1]
+    pdf_path = root / "data" / "test.pdf"
+
+    with extract_pdf_assets_tmp(pdf_path, dpi=72, workers=1, direct_markdown=True) as serial:
+        pass
+
+    monkeypatch.setattr("pdfmder.pdfium_extract._PARALLEL_MIN_PAGES", 1)
+    with extract_pdf_assets_tmp(pdf_path, dpi=72, workers=2, direct_markdown=True) as parallel:
+        pass
+
+    assert parallel == serial
+
+
+def test_extracted_text_matches_pypdfium2_text_range() -> None:
+    root = Path(__file__).resolve().parents[1]
+    pdf_path = root / "data" / "test.pdf"
+
+    with pdfium.PdfDocument(str(pdf_path)) as pdf:
+        expected = [pdf[i].get_textpage().get_text_range() for i in range(len(pdf))]
+
+    with extract_pdf_assets_tmp(pdf_path, dpi=72, workers=1) as (_page_images, page_texts, _direct_pages, _page_count):
+        assert page_texts == expected
+        assert any(text.strip() for text in page_texts)
+
+
+def test_only_scanned_pages_and_their_neighbours_are_rendered(tmp_path: Path) -> None:
+    pdf_path = tmp_path / "mixed.pdf"
+    c = canvas.Canvas(str(pdf_path), pagesize=letter)
+    for page in range(5):
+        # Page 4 has no text layer, like a scanned page.
+        if page != 3:
+            c.drawString(72, 720, f"Page {page + 1} has a text layer that is long enough to use.")
+        c.showPage()
+    c.save()
+
+    with extract_pdf_assets_tmp(pdf_path, dpi=72, all_images=False) as (
+        page_images,
+        _page_texts,
+        _direct_pages,
+        _page_count,
+    ):
+        assert [image is not None for image in page_images] == [False, False, True, True, True]
+
+    with extract_pdf_assets_tmp(pdf_path, dpi=72, all_images=False, neighbour_images=False) as (
+        page_images,
+        _page_texts,
+        _direct_pages,
+        _page_count,
+    ):
+        assert [image is not None for image in page_images] == [False, False, False, True, False]
@@ -1,24 +1,43 @@
 from __future__ import annotations
 
+import io
 from pathlib import Path
 
 import pypdfium2 as pdfium
+from PIL import Image
 
-from pdfmder.pdfium_images import render_pdf_pages_to_images_tmp
+from pdfmder.pdfium_images import (
+    _is_flat_page,
+    render_page,
+    write_page_images,
+)
 
 
-def test_render_pages_returns_correct_page_count() -> None:
+def test_render_page_caps_the_longer_side() -> None:
     root = Path(__file__).resolve().parents[1]
     pdf_path = root / "data" / "test.pdf"
 
-    expected_pages = len(pdfium.PdfDocument(str(pdf_path)))
+    with pdfium.PdfDocument(str(pdf_path)) as pdf:
+        page = pdf[0]
+        image = render_page(page, dpi=150, image_format="jpeg", max_side=400)
+        page.close()
 
-    with render_pdf_pages_to_images_tmp(pdf_path, dpi=72) as (paths, images, page_count):
-        assert page_count == expected_pages
-        assert len(paths) == expected_pages
-        assert len(images) == expected_pages
-        # The temp files should exist while in context
-        assert all(p.exists() for p in paths)
+    assert image.startswith(b"\xff\xd8")
+    with Image.open(io.BytesIO(image)) as pil:
+        assert max(pil.size) <= 400
 
-    # After exiting context, temp paths should no longer exist
-    assert all(not p.exists() for p in paths)
+
+def test_write_page_images_names_files_after_their_format(tmp_path: Path) -> None:
+    paths = write_page_images([b"\x89PNG one", b"\xff\xd8 two"], tmp_path / "dump")
+
+    assert [p.name for p in paths] == ["page-0001.png", "page-0002.jpg"]
+    assert paths[1].read_bytes() == b"\xff\xd8 two"
+
+
+def test_is_flat_page_separates_text_pages_from_photos() -> None:
+    text_like = Image.new("RGB", (600, 800), "white")
+    text_like.paste((0, 0, 0), (50, 50, 550, 60))
+    noise = Image.merge("RGB", [Image.effect_noise((600, 800), 80) for _ in range(3)])
+
+    assert _is_flat_page(text_like)
+    assert not _is_flat_page(noise)